@@ -2,10 +2,16 @@
 This program creates the class "Encoder" which initializes the timers/counters required for the encoder using provided channel pins and a timer/counter.
 This class also contains the ability to set the read the overall motor position in radians or counts (being able to bypass overflow and underflow), and is able to zero at any position.
 """
+import array
+import micropython
 import motor_driver
 import utime
 import pyb
-import math
+from micropython import const
+from math import pi as _PI
+
+# Enables the status prints of this driver (set to 1 to compile them in)
+_DEBUG = const(0)
 
 class Encoder:
     """! 
@@ -22,10 +28,15 @@ class Encoder:
         self.prev_count = 0
         self.tot_count = 0
         self.CPR = CPR 
+        # Radians per encoder count (2*pi/(4*CPR) for quadrature counting)
+        self._rad_per_count = _PI/(2*CPR)
         
         try:
             # Initialized Counter  
             self.timer = timer
+            # Caches the counter range (AR+1) and half range, as the period is fixed once the timer is set up
+            self._ARp1 = int(timer.period()) + 1
+            self._half = self._ARp1 >> 1
             # Initializing the Timer Channels
             self.timer_Encoder_6 = self.timer.channel(1,
                                                       pyb.Timer.ENC_AB,
@@ -33,34 +44,35 @@ class Encoder:
             self.timer_Encoder_7 = self.timer.channel(2,
                                                       pyb.Timer.ENC_AB,
                                                       pin=in7pin)
-            print ("Created a encoder")
+            if _DEBUG:
+                print ("Created a encoder")
         except Exception as e:
             print(e)
 
 
-    def read_position(self):
+    @micropython.viper
+    def read_position(self) -> int:
         """!
         This method calculates the current motor position
         and prints out the result. This motor position bypasses
         overflow and underflow, meaning it can count below and above
         the given timer period.
+        Compiled with the viper emitter so the count arithmetic runs as native integer code.
         @returns The total count position of the motor 
         """
-        count = self.timer.counter()
+        count = int(self.timer.counter())
+        half = int(self._half)
+        ARp1 = int(self._ARp1)
         
-        delta = count-self.prev_count
-        AR = int(self.timer.period())
+        delta = count-int(self.prev_count)
         
-        # For overflow
-        if delta <= -(AR+1)/2:
-            self.tot_count += (AR+1)+delta
-        # For underflow
-        elif delta >= (AR+1)/2:
-            self.tot_count += delta-(AR+1)
-        else:
-            self.tot_count += delta
+        # Wraps the delta into [-half, half) with a single modulo to correct for overflow and underflow
+        # (offset by a full range first so the dividend is never negative)
+        delta = (delta + half + ARp1) % ARp1 - half
+        tot_count = int(self.tot_count) + delta
+        self.tot_count = tot_count
         self.prev_count = count
-        return self.tot_count
+        return tot_count
     
     
     def convert_count_to_rad(self):
@@ -68,8 +80,7 @@ class Encoder:
         This method converts the total count from counts per revolution to radians
         @returns The total position of the motor in radians
         """
-        tot_count_rad = self.tot_count*(2*(math.pi)/(self.CPR*4))
-        return tot_count_rad
+        return self.tot_count*self._rad_per_count
     
     
     def read_position_rad(self):
@@ -86,7 +97,8 @@ class Encoder:
         This method zeros the encoder at the current motor position.
         """
         self.tot_count = 0
-        print(self.tot_count)
+        if _DEBUG:
+            print(self.tot_count)
   
            
 # Test Code
@@ -107,11 +119,20 @@ if __name__ == "__main__":
     
     encoder_B.read_position_rad()
     
+    # Preallocated int32 buffers holding the last N samples of each encoder
+    N = 100
+    buf_B = array.array('i', bytes(4*N))
+    buf_C = array.array('i', bytes(4*N))
+    idx = 0
+    
     # Hand Test
     while True:
         try:
-            print(encoder_B.read_position())
-            print(encoder_C.read_position())
+            buf_B[idx] = encoder_B.read_position()
+            buf_C[idx] = encoder_C.read_position()
+            print(buf_B[idx])
+            print(buf_C[idx])
+            idx = (idx+1) % N
             utime.sleep_ms(100)
         except KeyboardInterrupt:
             encoder_B.zero()
@@ -1,145 +1,98 @@
 """!
 @file main.py
-    This program manages and allows two cotasks, task1_fun (Timing) and task2_fun (Shooting), to be run without blocking each other upon the microcontroller's reset.
-    The Timing task initializes a pin to take an input from a button in which it then begins to track each of the required timers for the shootout.
+    This program manages and allows two tasks, the Timing task (shootout_timer.py) and task2_fun (Shooting), to be run without blocking each other upon the microcontroller's reset.
+    The Timing task runs from a hardware timer interrupt rather than as a cotask. It initializes a pin to take an input from a button in which it then begins to track each of the required timers for the shootout.
     Each section of the shootout will have its corresponding flag set when each timer ends.
     The Shooting task initializes the pin controlling the MOSFET output to the Nerf gun flywheel, the I2C channel for the thermal camera, the pins and timers for the panning motor and encoder, and the pin, timer, and PID controller for the servo motor.
-    This task will then manage the motor control for initial rotation using the motor driver, encoder, and PID controller, the centroid/hotspot detection using the thermal camera, the aiming at the determined centroid/hotspot, firing using the pin-to-flywheel circuit and servo motor, and rotation back to its starting point.
+    This task will then manage the motor control for initial rotation using the motor driver, encoder, and PID controller (run from a hardware timer interrupt by pid_timer.py), the centroid/hotspot detection using the thermal camera, the aiming at the determined centroid/hotspot, firing using the pin-to-flywheel circuit and servo motor, and rotation back to its starting point.
     During each of the shootout's sections, the states will be watching for changes in the timer's flag changes and change modes correspondingly. 
     Notes:
     * Each of these tasks' finite state machines can be found in the README on Github.
     * Tuning of controller gains, thermal readings, and timings may be adjusted per the requirements of operation by searching for "EDIT:" comments.
 """
 
+import array
 import gc
+import micropython
 import pyb
 import utime
 import cotask
-import task_share
 import motor_driver
 import encoder_reader
-import mlx_cam
 import motor_control
-import servo
+import pid_timer
+import shootout_timer
+from shootout_timer import START_FLAG, STOP_FLAG, RETURN_FLAG, BUTTON_FLAG
 from machine import Pin, I2C
+from micropython import const
 
-      
-def task1_fun(shares):
+## Enables the debugging prints; as a const the compiler drops the prints entirely when it is 0
+_DEBUG = const(0)
+
+# Turret aiming constants for the Locate state, folded at import so each image only needs multiplies
+_COUNT_PER_180 = const(80000) # Counts per 180 degrees
+_COUNT_PER_DEGREE = _COUNT_PER_180/180 # Count per every 1 degree
+_DEG_PER_PIXEL = 55/32 # Horizontal field of view per pixel for the 32 pixel wide camera
+_WEIGHT_DIST = (70/100, 30/100) # EDIT: Adjust to make the effect of centroid or hotspot more impactful
+# Weights of the centroid and hotspot X-positions in the averaged angle, including the averaging /2
+_K_CENTROID = _DEG_PER_PIXEL*_WEIGHT_DIST[0]/2
+_K_HOTSPOT = _DEG_PER_PIXEL*_WEIGHT_DIST[1]/2
+# The same weights converted straight from pixels to motor counts
+_COUNT_K_CENTROID = _K_CENTROID*_COUNT_PER_DEGREE
+_COUNT_K_HOTSPOT = _K_HOTSPOT*_COUNT_PER_DEGREE
+
+# Stay-within-range times (ms) and ranges (counts) the turret must settle in before each PID move ends, folded into the bytecode as consts
+_TURN_TIME = const(1000) # 1 second stay-within-range time for the initial 180 degree turn
+_TURN_RANGE = const(1000) # 1000 count stay-within-range for the initial 180 degree turn
+# EDIT: Adjust _TARGET_TIME and _TARGET_RANGE if you need shorter waiting time before firing and don't care as much about accuracy
+# (decrease _TARGET_TIME, increase _TARGET_RANGE)
+_TARGET_TIME = const(100) # 0.1 second stay-within-range time when aiming at the target
+_TARGET_RANGE = const(2000) # 2000 count stay-within-range when aiming at the target
+_RETURN_TIME = const(1000) # 1 second stay-within-range time for the return to 0 degrees
+_RETURN_RANGE = const(2500) # 2500 count stay-within-range for the return to 0 degrees
+_FIRE_TIME = const(200) # 0.2 second time the servo holds the trigger
+_CAMERA_POLL = const(40) # ms between asking the camera for an image
+
+# Servo trigger angles in degrees and the encoder counter's auto-reload period
+_FIRE_ANGLE = const(45) # Angle which pulls the trigger
+_REST_ANGLE = const(80) # Angle which releases the trigger
+_ENC_PERIOD = const(65535) # Full 16 bit range of the encoder counter
+
+
+def _hold_position(pid, setpoint, Kp, Ki, Kd, range_interval, time_interval, flags, abort=None):
     """!
-    Timing task that determines how long each section of the shootout will last
-    @param shares A list holding the four shares, Start_Flag, Stop_Flag, Return_Flag, and Button_Flag set by this task
+    Runs the PID controlled motor until the encoder reads that the motor position is within a stay-within-range for a stay-within-range time,
+    yielding to the scheduler in between. Used by the Shooting task's states with "yield from".
+    @param pid The PIDTimer object running the panning motor
+    @param setpoint The desired position of the motor in counts
+    @param Kp The proportional controller gain
+    @param Ki The integral controller gain
+    @param Kd The derivative controller gain
+    @param range_interval The stay-within-range of the setpoint in counts
+    @param time_interval The stay-within-range time in ms
+    @param flags The array of intertask flags
+    @param abort The index of the flag which stops the move early when set, or None to always finish the move
+    @returns True once the motor has stayed within range and been stopped, or False if the abort flag was set first
     """
-    # Gets references to the shares which have been passed to this task
-    Start_Flag, Stop_Flag, Return_Flag, Button_Flag = shares
-    # Init yield
-    yield 0
-    
-    # Timing task's state management
-    state = 0
+    pid.set_target(setpoint, Kp, Ki, Kd, range_interval, time_interval)
     while True:
-        if state == 0:
-            """!
-            S0: Init
-            Initializes the required pins and flags used in the Timing task
-            """
-            print('state 0 for task 1')
-            # Initializes input pin for the starting button
-            pinB0 = pyb.ADC(pyb.Pin.board.PB0)
-            # Initializes intertask flag variables
-            Start_Flag.put(0)
-            Stop_Flag.put(0)
-            Return_Flag.put(0)
-            Button_Flag.put(0)
-            state = 1
-            print('state 1 for task 1')
-        elif state == 1:
-            """!
-            S1: Wait For Input
-            Waits for an input from the initialized GPIO pin wired to the starting button
-            """
-            # Checks if the starting button pin reads a voltage greater than 2V (should be around 3.3V minus voltage drops across wires and resistors)
-            # Then changes state and sets the Button_Flag
-            if (pinB0.read()*3.3/4095) >= 2:
-                state = 2
-                Button_Flag.put(1)
-                print('state 2 for task 1')
-        elif state == 2:
-            """!
-            S2: Wait For Start
-            Waits 5 seconds for the starting phase, in which the target can move around, to end
-            """
-            # Sets up a 5 second timer to wait until it elapses
-            # Then changes state and sets the Start_Flag
-            time_interval = 5000 # 5 second overall run time
-            start_time = utime.ticks_ms()
-            end_time = utime.ticks_add(start_time,time_interval)
-            curr_time = start_time
-            while utime.ticks_diff(end_time,curr_time) > 0:
-                curr_time = utime.ticks_ms()
-                yield 0
-            Start_Flag.put(1)
-            state = 3
-            print('state 3 for task 1')
-        elif state == 3:
-            """!
-            S3: Wait For Stop
-            Waits 10 seconds for the shooting phase, in which the turret is allowed to fire, to end
-            """
-            # Sets up a 10 second timer to wait until it elapses
-            # Then changes state and sets the Stop_Flag
-            time_interval = 10000 # 10 second overall run time
-            start_time = utime.ticks_ms()
-            end_time = utime.ticks_add(start_time,time_interval)
-            curr_time = start_time
-            while utime.ticks_diff(end_time,curr_time) > 0:
-                curr_time = utime.ticks_ms()
-                yield 0
-            Start_Flag.put(0)
-            Stop_Flag.put(1)
-            state = 4
-            print('state 4 for task 1')
-        elif state == 4:
-            """!
-            S4: Stopped
-            Waits 1 second for the for the turret to stop before returning to its original position
-            """
-            # Sets up a 1 second timer to wait until it elapses
-            # Then changes state and sets the Return_Flag
-            time_interval = 1000 # 1 second overall run time
-            start_time = utime.ticks_ms()
-            end_time = utime.ticks_add(start_time,time_interval)
-            curr_time = start_time
-            while utime.ticks_diff(end_time,curr_time) > 0:
-                curr_time = utime.ticks_ms()
-                yield 0
-            Stop_Flag.put(0)
-            Return_Flag.put(1)
-            state = 5
-            print('state 5 for task 1')
-        elif state == 5:
-            """!
-            S5: Return
-            Waits 3 seconds for the for the turret to return to its original position
-            """
-            # Sets up a 3 second timer to wait until it elapses
-            time_interval = 3000 # 3 second overall run time
-            start_time = utime.ticks_ms()
-            end_time = utime.ticks_add(start_time,time_interval)
-            curr_time = start_time
-            while utime.ticks_diff(end_time,curr_time) > 0:
-                curr_time = utime.ticks_ms()
-                yield 0
-            Return_Flag.put(0)
+        if abort is not None and flags[abort]:
+            return False
+        elif pid.settled:
+            pid.stop()
+            return True
         yield 0
-            
-      
-def task2_fun(shares):
+
+
+def task2_fun(flags):
     """!
     Shooting task that controls the targetting, panning, and firing of the Nerf gun turret with its timings to change certain states set by the Timer task
-    @param shares A list holding the three shares, Start_Flag, Stop_Flag, Return_Flag, and Button_Flag used by this task
+    @param flags An array('h') of the four flags, indexed by START_FLAG, STOP_FLAG, RETURN_FLAG, and BUTTON_FLAG, used by this task
     """
-    # Get references to the share and queue which have been passed to this task
-    Start_Flag, Stop_Flag, Return_Flag, Button_Flag = shares
+    # Binds the timing functions to locals so the polling loops skip the attribute lookups
+    _ticks_ms = utime.ticks_ms
+    _ticks_diff = utime.ticks_diff
+    _ticks_add = utime.ticks_add
     # Init yield
     yield 0
     
@@ -151,7 +104,13 @@ def task2_fun(shares):
             S0: Init
             Initializes the required pins, timers, I2C channels, drivers, controller variables, and miscellaneous setting variables for the panning motor, encoder, flywheel GPIO pin, thermal camera, and servo
             """
-            print('state 0 for task 2')
+            if _DEBUG:
+                print('state 0 for task 2')
+
+            # Imports the camera and servo drivers here, as only this state uses them, so their import cost lands in S0 instead of at boot
+            # (the modules stay loaded in sys.modules, so the collection at the end of S0 only frees the garbage left from importing them)
+            import mlx_cam
+            import servo
 
             # Initializes the GPIO Pin for the flywheel motor MOSFET
             PC1 = pyb.Pin(pyb.Pin.board.PC1, pyb.Pin.OUT_PP)
@@ -161,13 +120,19 @@ def task2_fun(shares):
             i2c_bus = I2C(1)
             # Selects MLX90640 camera I2C address, normally 0x33, and check the bus
             i2c_address = 0x33
-            scanhex = [f"0x{addr:X}" for addr in i2c_bus.scan()]
-            print(f"I2C Scan: {scanhex}")
+            if _DEBUG:
+                print('I2C Scan:', i2c_bus.scan())
             # Creates the camera object and set it up in default mode
             camera = mlx_cam.MLX_Cam(i2c_bus)
-            print(f"Current refresh rate: {camera._camera.refresh_rate}")
+            if _DEBUG:
+                print('Current refresh rate:', camera._camera.refresh_rate)
             camera._camera.refresh_rate = 10.0
-            print(f"Refresh rate is now:  {camera._camera.refresh_rate}")
+            if _DEBUG:
+                print('Refresh rate is now: ', camera._camera.refresh_rate)
+            # Allocates the image buffer once so getting each image doesn't churn the heap
+            img_buf = array.array('h', bytes(2*mlx_cam.IMAGE_SIZE))
+            # Preallocated [centroid x, centroid y, hotspot x, hotspot y] filled in by each image's processing
+            aim = array.array('f', [0.0, 0.0, 0.0, 0.0])
     
             # Initializes the motor pins and timers
             a_pin = pyb.Pin(pyb.Pin.board.PA10, pyb.Pin.OUT_PP)
@@ -179,7 +144,7 @@ def task2_fun(shares):
             moe.enable()
 
             # Initializes the encoder counter and pins
-            timer_C = pyb.Timer(8, period=65535, prescaler=0)
+            timer_C = pyb.Timer(8, period=_ENC_PERIOD, prescaler=0)
             pinC6 = pyb.Pin(pyb.Pin.board.PC6)
             pinC7 = pyb.Pin(pyb.Pin.board.PC7)
             # Creates the encoder object
@@ -194,193 +159,164 @@ def task2_fun(shares):
             setpoint = 0
             # Creates the motor controller object
             moe_con = motor_control.MotorControl(setpoint, Kp, Ki, Kd)
+            # Runs the PID controlled motor from a hardware timer interrupt at 200 Hz so image processing can't starve it
+            pid = pid_timer.PIDTimer(enc, moe, moe_con, pyb.Timer(6), freq=200)
             
             # Initializes the servo pins and timers
             servo_pin = pyb.Pin(pyb.Pin.board.PA8, pyb.Pin.OUT_PP)
             s_timer = pyb.Timer(1, prescaler=79, period=19999)
-            my_servo = servo.Servo(pin=servo_pin, timer=s_timer, zero_angle=80)
+            my_servo = servo.Servo(pin=servo_pin, timer=s_timer, zero_angle=_REST_ANGLE)
+            # Binds the flywheel pin and camera methods used in the later states to locals so they skip the attribute lookups
+            _pc1_high = PC1.high
+            _pc1_low = PC1.low
+            _get_image = camera.get_image_nonblocking_into
             
             # Miscellaneous setting variables
             shoot = 1
             refire = 0 # EDIT: Adjust for the number of ADDITIONAL shots
+            entered = False # Whether the entry actions of S5 have been done
+            # Cleans up the garbage from the initialization while timing doesn't matter
+            gc.collect()
             state = 1
-            print('state 1 for task 2')
+            if _DEBUG:
+                print('state 1 for task 2')
         elif state == 1:
             """!
             S3: Wait For Start
-            Rotates the turret 180 degrees and waits during the initial 5 seconds until the Timer task sets the Start_Flag
+            Rotates the turret 180 degrees and waits during the initial 5 seconds until the Timer task sets the start flag
             """
             # Waits for the start of the shooting phase
-            if Start_Flag.get():
+            if flags[START_FLAG]:
                 state = 2
-                print('state 2 for task 2')
+                if _DEBUG:
+                    print('state 2 for task 2')
             
             # Rotates the turret 180 degrees (count of 80000)
-            elif Button_Flag.get():  
+            elif flags[BUTTON_FLAG]:  
                 # Sets the setpoint corresponding to 180 degrees and sets the gains for the controller
-                des_pos = 80000
+                des_pos = _COUNT_PER_180
                 setpoint = des_pos
                 Kp = 0.25
                 Ki = 0
                 Kd = 0
-                moe_con.set_gain(Kp, Ki, Kd)
-                moe_con.set_setpoint(setpoint)
                     
-                # Runs the PID controlled motor until the encoder reads that the motor position is within a stay-within-range, range_interval, for a stay-within-range time, time_interval
-                time_interval = 1000 # 1 second stay-within-range time
-                range_interval = 1000 # 1000 count stay-within-range
-                first_time = 1 # Check for initial stay-within-range
-                while True:
-                    if Start_Flag.get():
-                        state = 2
+                # Runs the PID controlled motor until the encoder reads that the motor position is within a stay-within-range, _TURN_RANGE, for a stay-within-range time, _TURN_TIME
+                if (yield from _hold_position(pid, setpoint, Kp, Ki, Kd, _TURN_RANGE, _TURN_TIME, flags, START_FLAG)):
+                    flags[BUTTON_FLAG] = 0
+                else:
+                    state = 2
+                    if _DEBUG:
                         print('state 2 for task 2')
-                        break
-                    else:
-                        curr_time = utime.ticks_ms()
-                        pos = enc.read_position()
-                        PWM = moe_con.run(pos, 7)
-                        moe.set_duty_cycle(PWM)
-                        # Checks if we are within the stay-within-range interval of our desired position and starts the stay-within-range timer
-                        if pos >= (des_pos-range_interval) and pos <= (des_pos+range_interval):
-                            if first_time:
-                                start_time = utime.ticks_ms()
-                                end_time = utime.ticks_add(start_time,time_interval)
-                                curr_time = start_time
-                                first_time = 0
-                            elif utime.ticks_diff(end_time,curr_time) < 0:
-                                first_time = 1
-                                moe.set_duty_cycle(0)
-                                Button_Flag.put(0)
-                                break
-                        else:
-                            first_time = 1
-                    yield 0
         elif state == 2:
             """!
             S2: Locate
             Uses the thermal camera to determine the centroid/hotspot where the target should be locatedand calculates the required position the motor needs to move to
             """
             # Determines the position that the turret needs to be at to be centered on the target
-            if Stop_Flag.get():
+            if flags[STOP_FLAG]:
                 state = 5
-                print('state 5 for task 2')
+                if _DEBUG:
+                    print('state 5 for task 2')
             else:
-                Button_Flag.put(0)
+                flags[BUTTON_FLAG] = 0
                 # Turns on the flywheel
-                PC1.high()
-                # Keeps trying to get an image until it collects one
-                image = None
-                while not image:
-                    if Stop_Flag.get():
+                _pc1_high()
+                # Keeps trying to get an image until it collects one, only asking the camera (an I2C status register read) every 40 ms
+                # since it takes around 100 ms for each subpage to be ready at a 10 Hz refresh rate
+                got_image = False
+                poll_time = _ticks_ms()
+                while not got_image:
+                    if flags[STOP_FLAG]:
                         state = 5
-                        print('state 5 for task 2')
+                        if _DEBUG:
+                            print('state 5 for task 2')
                         break
-                    image = camera.get_image_nonblocking()
+                    curr_time = _ticks_ms()
+                    if _ticks_diff(curr_time, poll_time) >= 0:
+                        poll_time = _ticks_add(curr_time, _CAMERA_POLL)
+                        got_image = _get_image(img_buf)
                     yield 0
                 
-                # Processes image to get the centroid and hotspot of the hottest region, ignoring temperatures besides those between the ignore range (%)
-                ignore = [91, 100] # EDIT: Adjust until we get an appropriate/accurate shot (See camera outputs in mlx_cam.py if needed)
-                centered = True # Boolean for x-y locations either from the top-left corner or from the center
-                x_bar_centroid, y_bar_centroid = camera.get_centroid(image, ignore, centered)
-                x_bar_hotspot, y_bar_hotspot = camera.get_hotspot(image, centered)
+                # Only processes the image if one was collected (the Stop_Flag may have ended the wait first)
+                if got_image:
+                    # Processes image to get the centroid and hotspot of the hottest region, ignoring temperatures besides those between the ignore range (%)
+                    ignore = [91, 100] # EDIT: Adjust until we get an appropriate/accurate shot (See camera outputs in mlx_cam.py if needed)
+                    centered = True # Boolean for x-y locations either from the top-left corner or from the center
+                    camera.get_centroid_and_hotspot_into(img_buf, ignore, centered, aim)
+                    x_bar_centroid = aim[0]
+                    x_bar_hotspot = aim[2]
                 
-                # Calculates the angle of the weighted average of the centroid and hotspot X-positions for the 32x28 pixel resolution camera
-                count_per_180 = 80000 # Counts per 180 degrees
-                count_per_degree = count_per_180/180 # Count per every 1 degree
-                weight_dist = [70/100, 30/100] # EDIT: Adjust to make the effect of centroid or hotspot more impactful
-                horz_angle_centroid = 55/32*x_bar_centroid
-                horz_angle_hotspot = 55/32*x_bar_hotspot
-                horz_angle = (horz_angle_centroid*weight_dist[0]+horz_angle_hotspot*weight_dist[1])/2
-                print(f'Centroid X: {horz_angle_centroid}')
-                print(f'Hotspot X: {horz_angle_hotspot}')
-                print(f'Weighted Average X: {horz_angle}')
-                
-                # Calculates the count position of the motor
-                dcount = horz_angle*count_per_degree
-                des_pos = count_per_180 + dcount
-                state = 3
-                print('state 3 for task 2')
+                    # Calculates the count position of the motor from the weighted average of the centroid and hotspot X-positions for the 32x28 pixel resolution camera
+                    dcount = _COUNT_K_CENTROID*x_bar_centroid + _COUNT_K_HOTSPOT*x_bar_hotspot
+                    des_pos = _COUNT_PER_180 + dcount
+                    if _DEBUG:
+                        print(f'Centroid X: {_DEG_PER_PIXEL*x_bar_centroid}')
+                        print(f'Hotspot X: {_DEG_PER_PIXEL*x_bar_hotspot}')
+                        print(f'Weighted Average X: {_K_CENTROID*x_bar_centroid + _K_HOTSPOT*x_bar_hotspot}')
+                    state = 3
+                    if _DEBUG:
+                        print('state 3 for task 2')
         elif state == 3:
             """!
             S3: Target
             Uses the motor position calculated from the Locate state to rotate the turret correspondingly
             """
             # Rerotates the turret to the new located position
-            if Stop_Flag.get():
+            if flags[STOP_FLAG]:
                 state = 5
-                print('state 5 for task 2')
+                if _DEBUG:
+                    print('state 5 for task 2')
             else:
+                # Collects once then turns off automatic garbage collection for the aim-and-fire window (S3 and S4) so it can't
+                # pause the aiming or the shot at random. It is turned back on once the shot is done or on the way to S5
+                if gc.isenabled():
+                    gc.collect()
+                    gc.disable()
                 # Turns on the flywheel
-                PC1.high()
+                _pc1_high()
                 # Sets the setpoint corresponding to the calculated position and sets the gains for the controller
                 setpoint = des_pos
                 Kp = 0.2 # EDIT: Adjust Kp if there is a lot of slip(?)
                 Ki = 0 # EDIT: You shouldn't need to touch Ki or Kd. Time-to-speed isn't that bad and gear slip is worse.
                 Kd = 0
-                moe_con.set_gain(Kp, Ki, Kd)
-                moe_con.set_setpoint(setpoint)
                 
-                # EDIT: Adjust time_interval and range_interval if you need shorter waiting time before firing and don't care as much about accuracy
-                # (decrease time_interval, increase range_interval)
-                time_interval = 100 # 0.1 second stay-within-range time
-                range_interval = 2000 # 2000 count stay-within-range
-                first_time = 1
-                # Runs the PID controlled motor until the encoder reads that the motor position is within a stay-within-range, range_interval, for a stay-within-range time, time_interval
-                while True:
-                    if Stop_Flag.get():
-                        state = 5
+                # Runs the PID controlled motor until the encoder reads that the motor position is within a stay-within-range, _TARGET_RANGE, for a stay-within-range time, _TARGET_TIME
+                if (yield from _hold_position(pid, setpoint, Kp, Ki, Kd, _TARGET_RANGE, _TARGET_TIME, flags, STOP_FLAG)):
+                    state = 4
+                    if _DEBUG:
+                        print('state 4 for task 2')
+                else:
+                    state = 5
+                    if _DEBUG:
                         print('state 5 for task 2')
-                        break
-                    else:
-                        curr_time = utime.ticks_ms()
-                        pos = enc.read_position()
-                        PWM = moe_con.run(pos, 7)
-                        moe.set_duty_cycle(PWM)
-                        # Checks if we are within the stay-within-range interval of our desired position and starts the stay-within-range timer
-                        if pos >= (des_pos-range_interval) and pos <= (des_pos+range_interval):
-                            if first_time:
-                                start_time = utime.ticks_ms()
-                                end_time = utime.ticks_add(start_time,time_interval)
-                                curr_time = start_time
-                                first_time = 0
-                            elif utime.ticks_diff(end_time,curr_time) < 0:
-                                first_time = 1
-                                moe.set_duty_cycle(0)
-                                state = 4
-                                print('state 4 for task 2')
-                                break
-                        else:
-                            first_time = 1
-                    yield 0
         elif state == 4:
             """!
             S4: Shoot
             Uses the flywheel and servo to pull the trigger and fire the Nerf dart at the motors set position
             """
             # Sets the servo position to either 45 for shooting or 80 for not shooting
-            if Stop_Flag.get():
+            if flags[STOP_FLAG]:
                 state = 5
-                print('state 5 for task 2')
+                if _DEBUG:
+                    print('state 5 for task 2')
             else:
                 if shoot:
                     # Moves servo to firing angle of 45 degrees
-                    my_servo.SetAngle(45)
+                    my_servo.SetAngle(_FIRE_ANGLE)
                     refire -= 1
-                    time_interval = 200 # 0.2 second overall run time
-                    start_time = utime.ticks_ms()
-                    end_time = utime.ticks_add(start_time,time_interval)
-                    curr_time = start_time
-                    while utime.ticks_diff(end_time,curr_time) > 0:
-                        if Stop_Flag.get():
+                    end_time = _ticks_add(_ticks_ms(),_FIRE_TIME)
+                    while _ticks_diff(end_time,_ticks_ms()) > 0:
+                        if flags[STOP_FLAG]:
                             state = 5
                             break
-                        curr_time = utime.ticks_ms()
                         yield 0
                     shoot = 0
                 else:
                     # Moves servo to non-firing angle of 80 degrees and turns the flywheel off
-                    my_servo.SetAngle(80)
-                    PC1.low()
+                    my_servo.SetAngle(_REST_ANGLE)
+                    _pc1_low()
+                    # The shot is done, so automatic garbage collection resumes while relocating or waiting for the Stop_Flag
+                    gc.enable()
                     # Resets the shooting state and reloactes the target if refire isn't less than 0
                     if refire >= 0:
                         shoot = 1
@@ -390,15 +326,22 @@ def task2_fun(shares):
             S5: Stop
             Stops all motor motion and resets the servo
             """
-            # Sets pins and motors to passive settings
-            PC1.low()
-            moe.set_duty_cycle(0)
-            my_servo.SetAngle(80)
+            # Sets pins and motors to passive settings once on entry, as the writes don't need repeating while waiting
+            if not entered:
+                _pc1_low()
+                pid.stop()
+                my_servo.SetAngle(_REST_ANGLE)
+                # The aim-and-fire window is over, so automatic garbage collection can resume after cleaning up
+                gc.enable()
+                gc.collect()
+                entered = True
             # Waits until the 10 seconds for firing has elapsed before returning
-            if Return_Flag.get():
+            if flags[RETURN_FLAG]:
                 des_pos = 0
                 state = 6
-                print('state 6 for task 2')
+                entered = False
+                if _DEBUG:
+                    print('state 6 for task 2')
         elif state == 6:
             """!
             S6: Return
@@ -409,59 +352,41 @@ def task2_fun(shares):
             Kp = 0.25
             Ki = 0
             Kd = 0
-            moe_con.set_gain(Kp, Ki, Kd)
-            moe_con.set_setpoint(setpoint)
                 
-            time_interval = 1000 # 1 second stay-within-range time
-            range_interval = 2500 # 2500 count stay-within-range
-            first_time = 1
-            
-            # Runs the PID controlled motor until the encoder reads that the motor position is within a stay-within-range, range_interval, for a stay-within-range time, time_interval
-            while True:
-                pos = enc.read_position()
-                PWM = moe_con.run(pos, 7)
-                moe.set_duty_cycle(PWM)
-                # Checks if we are within the stay-within-range interval of our desired position and starts the stay-within-range timer
-                if pos >= (des_pos-range_interval) and pos <= (des_pos+range_interval):
-                    if first_time:
-                        start_time = utime.ticks_ms()
-                        end_time = utime.ticks_add(start_time,time_interval)
-                        curr_time = start_time
-                        first_time = 0
-                    elif utime.ticks_diff(end_time,curr_time) > 0:
-                        first_time = 1
-                        moe.set_duty_cycle(0)
-                        state = 4
-                        break
-                else:
-                    first_time = 1
+            # Runs the PID controlled motor until the encoder reads that the motor position is within a stay-within-range, _RETURN_RANGE, for a stay-within-range time, _RETURN_TIME
+            yield from _hold_position(pid, setpoint, Kp, Ki, Kd, _RETURN_RANGE, _RETURN_TIME, flags)
             
             # Turns off the motor and waits
-            moe.set_duty_cycle(0)
             moe.disable()
-            while True:
-                yield 0
+            state = 7
+            if _DEBUG:
+                print('state 7 for task 2')
+        elif state == 7:
+            """!
+            S7: Done
+            Waits with the motors disabled after the shootout has ended
+            """
+            pass
         yield 0
         
 
-# This code creates 4 shares and 2 tasks, then starts the tasks. The
+# This code creates the flag array, the Timing interrupt, and the Shooting task, then starts the scheduler. The
 # tasks run until somebody presses ENTER, at which time the scheduler stops.
 if __name__ == "__main__":
-    # Creates 4 shares to be intertask variables
-    Start_Flag = task_share.Share('h', thread_protect=False, name="Start Flag")
-    Stop_Flag = task_share.Share('h', thread_protect=False, name="Stop Flag")
-    Return_Flag = task_share.Share('h', thread_protect=False, name="Return Flag")
-    Button_Flag = task_share.Share('h', thread_protect=False, name="Button Flag")
+    # Creates one array holding the 4 intertask flags, indexed by START_FLAG, STOP_FLAG, RETURN_FLAG, and BUTTON_FLAG
+    flags = array.array('h', [0, 0, 0, 0])
+
+    # Starts the Timing task on a hardware timer interrupt (see shootout_timer.py) so it doesn't take up scheduler time,
+    # with an emergency buffer so exceptions raised in the callback can still be reported
+    micropython.alloc_emergency_exception_buf(100)
+    timing = shootout_timer.ShootoutTimer(flags, pyb.Pin.board.PB0, pyb.Timer(5))
 
-    # Creates the tasks two cotasks. If trace is enabled for any task, memory will be
+    # Creates the Shooting cotask. If trace is enabled for any task, memory will be
     # allocated for state transition tracing, and the application will run out
     # of memory after a while and quit. Therefore, use tracing only for 
     # debugging and set trace to False when it's not needed
-    task1 = cotask.Task(task1_fun, name="Task_1", priority=2, period=20,
-                        profile=True, trace=False, shares=(Start_Flag, Stop_Flag, Return_Flag, Button_Flag))
-    task2 = cotask.Task(task2_fun, name="Task_2", priority=1, period=7,
-                        profile=True, trace=False, shares=(Start_Flag, Stop_Flag, Return_Flag, Button_Flag))
-    cotask.task_list.append(task1)
+    task2 = cotask.Task(task2_fun, name="Task_2", priority=1, period=8,
+                        profile=True, trace=False, shares=flags)
     cotask.task_list.append(task2)
 
     # Run the memory garbage collector to ensure memory is as defragmented as
@@ -469,9 +394,13 @@ if __name__ == "__main__":
     gc.collect()
 
     # Run the scheduler with the chosen scheduling algorithm. Quit if ^C pressed
-    while True:
-        try:
-            cotask.task_list.pri_sched()
-        except KeyboardInterrupt:
-            break
+    try:
+        while True:
+            try:
+                cotask.task_list.pri_sched()
+            except KeyboardInterrupt:
+                break
+    finally:
+        # Turns automatic garbage collection back on if the program stops during the aim-and-fire window
+        gc.enable()
 
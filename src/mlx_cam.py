@@ -18,6 +18,7 @@ whose use is greatly simplified in comparison to that of the base class,
     License, version 3.
 """
 
+import micropython
 import utime as time
 import array as np
 from machine import Pin, I2C
@@ -26,6 +27,57 @@ from mlx90640.calibration import NUM_ROWS, NUM_COLS, IMAGE_SIZE, TEMP_K
 from mlx90640.image import ChessPattern, InterleavedPattern
 
 
+@micropython.viper
+def _sum_pixels(buf: ptr16, sums: ptr32):
+    """!
+    @brief   Accumulates the centroid sums and finds the hotspot of a raw
+             image as native integer code.
+    @details The image is read through the same mirrored column order as
+             the other image methods. This is the only centroid and hotspot
+             pixel pass, which all of the camera's centroid and hotspot
+             methods use.
+    @param   buf An array('h') of (width * height) raw pixel values
+    @param   sums An array('i') of [width, height, lowest kept value, Tmin,
+             Trange, Tmax] followed by five outputs, which are filled with
+             the T*x sum, T*y sum, T sum, hotspot column, and hotspot row
+    """
+    width = sums[0]
+    height = sums[1]
+    lo = sums[2]
+    Tmin = sums[3]
+    Trange = sums[4]
+    Tmax = sums[5]
+    Tx = 0
+    Ty = 0
+    T = 0
+    x_max = 0
+    y_max = 0
+    row = 0
+    while row < height:
+        base = row * width + width - 1
+        col = 0
+        while col < width:
+            # Sign extends the 16 bit pixel value
+            value = int(buf[base - col])
+            if value >= 32768:
+                value -= 65536
+            if value >= lo:
+                pix = (value - Tmin) * 100 // Trange
+                Tx += pix * col
+                Ty += pix * row
+                T += pix
+            if value == Tmax:
+                x_max = col
+                y_max = row
+            col += 1
+        row += 1
+    sums[6] = Tx
+    sums[7] = Ty
+    sums[8] = T
+    sums[9] = x_max
+    sums[10] = y_max
+
+
 class MLX_Cam:
     """!
     @brief   Class which wraps an MLX90640 thermal infrared camera driver to
@@ -61,6 +113,8 @@ class MLX_Cam:
         self._getting_image = False
         ## Which subpage (checkerboard half) of the image is being retrieved
         self._subpage = 0
+        ## The inputs and outputs of the native pixel summing, allocated once
+        self._sums = np.array('i', [0] * 11)
 
         # The MLX90640 object that does the work
         self._camera = MLX90640(i2c, address)
@@ -104,13 +158,23 @@ class MLX_Cam:
                  0 to 255
         """
         minny = min(array)
-        scale = 255.0 / (max(array) - minny)
+        # A flat image (such as right after startup) is drawn all dark instead of dividing by zero
+        scale = 255.0 / ((max(array) - minny) or 1)
+        width = self._width
+        # Each shade's escape code is only formatted once per image
+        shades = {}
         for row in range(self._height):
-            for col in range(self._width):
-                pix = int((array[row * self._width + (self._width - col - 1)]
-                           - minny) * scale)
-                print(f"\033[38;2;{pix};{pix};{pix}m{pixel}", end='')
-            print(f"\033[38;2;{textcolor}m")
+            # Builds each row (walking its columns mirrored) and prints it at once
+            start = row * width
+            line = ""
+            for index in range(start + width - 1, start - 1, -1):
+                pix = int((array[index] - minny) * scale)
+                shade = shades.get(pix)
+                if shade is None:
+                    shade = f"\033[38;2;{pix};{pix};{pix}m{pixel}"
+                    shades[pix] = shade
+                line += shade
+            print(f"{line}\033[38;2;{textcolor}m")
 
 
     ## A "standard" set of characters of different densities to make ASCII art
@@ -119,23 +183,27 @@ class MLX_Cam:
         """!
         @brief   Show a data array from the IR image as ASCII art.
         @details Each character is repeated twice so the image isn't squished
-                 laterally. A code of "><" indicates an error, probably caused
-                 by a bad pixel in the camera. 
+                 laterally. The pixels are scaled with integer math, and the
+                 hottest ones are shown with the densest character.
         @param   array The array to be shown, probably @c image.v_ir
         """
-        scale = len(MLX_Cam.asc) / (max(array) - min(array))
-        offset = -min(array)
+        minny = min(array)
+        # A flat image (such as right after startup) is drawn all blank instead of dividing by zero
+        rng = (max(array) - minny) or 1
+        chars = len(MLX_Cam.asc)
+        width = self._width
         for row in range(self._height):
+            # Builds each row (walking its columns mirrored) and prints it at once
+            start = row * width
             line = ""
-            for col in range(self._width):
-                pix = int((array[row * self._width + (self._width - col - 1)]
-                           + offset) * scale)
-                try:
-                    the_char = MLX_Cam.asc[pix]
-                    print(f"{the_char}{the_char}", end='')
-                except IndexError:
-                    print("><", end='')
-            print('')
+            for index in range(start + width - 1, start - 1, -1):
+                pix = int((array[index] - minny) * chars // rng)
+                # Only the hottest pixels scale to one past the last character
+                if pix >= chars:
+                    pix = chars - 1
+                the_char = MLX_Cam.asc[pix]
+                line += the_char + the_char
+            print(line)
         return
 
 
@@ -150,20 +218,19 @@ class MLX_Cam:
                  to which the data should be scaled, or @c None for no scaling
         """
         if limits and len(limits) == 2:
-            scale = (limits[1] - limits[0]) / (max(array) - min(array))
-            offset = limits[0] - min(array)
+            minny = min(array)
+            # A flat image is offset without dividing by zero
+            scale = (limits[1] - limits[0]) / ((max(array) - minny) or 1)
+            offset = limits[0] - minny
         else:
             offset = 0.0
             scale = 1.0
+        width = self._width
         for row in range(self._height):
-            line = ""
-            for col in range(self._width):
-                pix = int((array[row * self._width + (self._width - col - 1)]
-                          + offset) * scale)
-                if col:
-                    line += ","
-                line += f"{pix}"
-            yield line
+            # Walks the row's columns mirrored, as in the other image methods
+            start = row * width
+            yield ",".join([str(int((array[index] + offset) * scale))
+                            for index in range(start + width - 1, start - 1, -1)])
         return
 
 
@@ -180,8 +247,9 @@ class MLX_Cam:
         @returns A reference to the image object we've just filled with data
         """
         for subpage in (0, 1):
+            # Checks for data every 5 ms so little time is lost after each subpage is ready
             while not self._camera.has_data:
-                time.sleep_ms(50)
+                time.sleep_ms(5)
             image = self._camera.read_image(subpage)
 
         return image
@@ -222,68 +290,59 @@ class MLX_Cam:
         else:
             self._getting_image = False
             return image
+
+
+    def get_image_nonblocking_into(self, buf):
+        """!
+        @brief   Get an image from an MLX90640 camera in a non-blocking way,
+                 copying it into a buffer supplied by the caller.
+        @details This works like @c get_image_nonblocking(), but the finished
+                 image is copied into @c buf so the caller can allocate it
+                 once and keep using it while the camera's own image object
+                 is being refilled.
+        @param   buf A preallocated array of (self._width * self._height)
+                 elements of the same type as the camera's image, such as
+                 @c array.array('h', bytes(2 * IMAGE_SIZE))
+        @returns True once @c buf holds a complete image, otherwise False
+        """
+        image = self.get_image_nonblocking()
+        if image is None:
+            return False
+        # Copies the whole image in one slice assignment rather than pixel by pixel
+        buf[:] = image
+        return True
         
         
     def get_centroid(self, array, ignore = [90, 100], centered = True):
         """!
         @brief   Finds the centroid of the highest temperature region.
-        @details This function finds the x and y positions of the centroid
-                 for the volume of the highest temperature through some data
-                 parsing and integration of temperature and their distances from the side.
-        @param   array The array of data to be presented
+        @details This is a wrapper around @c get_centroid_and_hotspot_into
+                 which only returns the centroid.
+        @param   array An array('h') of (self._width * self._height) raw pixel values
         @param   ignore A list of two percent integers for the percent of the lowest and highest
                  temperature pixels to ignore
         @param   centered A boolean to determine if we want the centroid
                  position given from the center or from the top left corner
+        @returns A tuple of the centroid (x, y) position
         """
-        Tx = 0
-        Ty = 0
-        T = 0
-        offset = -min(array)
-        scale = 100 / (max(array) - min(array))
-        # Centroid image processing 
-        for row in range(self._height):
-            for col in range(self._width):
-                pix = int((array[row * self._width + (self._width - col - 1)]
-                          + offset) * scale)
-                # Ignoring values outside of the ignore percentages
-                # Otherwise add to the new T*c and T
-                if pix < ignore[0] and pix < ignore[1]:
-                    pass
-                else:
-                    # Calculating T*c and T for each pixel
-                    Tx = Tx + pix*col
-                    Ty = Ty + pix*row
-                    T = T + pix
-        # Centroid position from the top left (if IR is oriented with text upwards)
-        x_bar = Tx/T
-        y_bar = Ty/T
-        # If we want the centroid position from the center of the screen
-        if centered:
-            x_bar = x_bar - self._width/2
-            y_bar = -y_bar + self._height/2
-        return (x_bar, y_bar)
+        return self.get_centroid_and_hotspot_into(array, ignore, centered)[0]
        
        
     def get_hotspot(self, array, centered = True):
         """!
         @brief   Finds the hotspot/position of the highest temperature.
-        @details This function finds the x and y positions of the hottest spot
-                 on the thermal camera.
-        @param   array The array of data to be presented
-        @param   centered A boolean to determine if we want the centroid
+        @details This function uses the same pixel pass as
+                 @c get_centroid_and_hotspot_into, but only returns the
+                 hotspot, so it also works on an image with no temperature range.
+        @param   array An array('h') of (self._width * self._height) raw pixel values
+        @param   centered A boolean to determine if we want the hotspot
                  position from the center or from the top left corner
+        @returns A tuple of the hotspot (x, y) position
         """
-        Tmax = max(array)
-        x_max = 0
-        y_max = 0
-        # Determining the position of Tmax row and column 
-        for row in range(self._height):
-            for col in range(self._width):
-                if int(array[row * self._width + (self._width - col - 1)]) == Tmax:
-                    # Hotspot position from the top left (if IR is oriented with text upwards)
-                    x_max = col
-                    y_max = row
+        sums = self._sum_image(array, (0, 100))
+        # Hotspot position from the top left (if IR is oriented with text upwards)
+        x_max = sums[9]
+        y_max = sums[10]
         # If we want the hotspot position from the center of the screen
         if centered:
             x_max = x_max - self._width/2
@@ -291,27 +350,119 @@ class MLX_Cam:
         return (x_max, y_max)
     
 
+    def get_centroid_and_hotspot(self, array, ignore = [90, 100], centered = True, out = None):
+        """!
+        @brief   Finds the centroid of the highest temperature region and the
+                 hotspot in a single pass over the image.
+        @details This is a wrapper around @c get_centroid_and_hotspot_into.
+        @param   array An array('h') of (self._width * self._height) raw pixel values
+        @param   ignore A list of two percent integers for the percent of the lowest and highest
+                 temperature pixels to ignore
+        @param   centered A boolean to determine if we want the centroid and hotspot
+                 positions given from the center or from the top left corner
+        @param   out An optional preallocated array of 4 floats which is filled
+                 with the centroid x, centroid y, hotspot x, and hotspot y
+                 positions instead of building a result tuple
+        @returns A tuple of the centroid (x, y) and hotspot (x, y) positions,
+                 or @c out once it has been filled
+        """
+        return self.get_centroid_and_hotspot_into(array, ignore, centered, out)
+
+
+    def _sum_image(self, buf, ignore):
+        """!
+        @brief   Runs the native pixel pass over a raw image buffer.
+        @param   buf An array('h') of (self._width * self._height) raw pixel values
+        @param   ignore A list of two percent integers for the percent of the lowest and highest
+                 temperature pixels to ignore
+        @returns The sums array, filled as described in @c _sum_pixels
+        """
+        sums = self._sums
+        Tmax = max(buf)
+        Tmin = min(buf)
+        Trange = Tmax - Tmin
+        sums[0] = self._width
+        sums[1] = self._height
+        if Trange:
+            # Lowest raw value that is not ignored, so ignored pixels are skipped
+            # with one integer comparison before any scaling
+            sums[2] = Tmin - (-min(ignore[0], ignore[1]) * Trange // 100)
+            sums[4] = Trange
+        else:
+            # With no temperature range no pixel is kept, so the pixel pass never divides by zero
+            sums[2] = Tmax + 1
+            sums[4] = 1
+        sums[3] = Tmin
+        sums[5] = Tmax
+        _sum_pixels(buf, sums)
+        return sums
+
+
+    def get_centroid_and_hotspot_into(self, buf, ignore = [90, 100], centered = True, out = None):
+        """!
+        @brief   Finds the centroid of the highest temperature region and the
+                 hotspot of a raw image buffer with native code.
+        @details The pixel pass is compiled with the viper emitter and uses
+                 integer math, so it only works on an array('h') buffer such
+                 as the one filled by @c get_image_nonblocking_into. The other
+                 centroid and hotspot methods all use this one.
+        @param   buf An array('h') of (self._width * self._height) raw pixel values
+        @param   ignore A list of two percent integers for the percent of the lowest and highest
+                 temperature pixels to ignore
+        @param   centered A boolean to determine if we want the centroid and hotspot
+                 positions given from the center or from the top left corner
+        @param   out An optional preallocated array of 4 floats which is filled
+                 with the centroid x, centroid y, hotspot x, and hotspot y
+                 positions instead of building a result tuple
+        @returns A tuple of the centroid (x, y) and hotspot (x, y) positions,
+                 or @c out once it has been filled
+        """
+        sums = self._sum_image(buf, ignore)
+        # Centroid position from the top left (if IR is oriented with text upwards)
+        x_bar = sums[6]/sums[8]
+        y_bar = sums[7]/sums[8]
+        x_max = sums[9]
+        y_max = sums[10]
+        # If we want the positions from the center of the screen
+        if centered:
+            x_bar = x_bar - self._width/2
+            y_bar = -y_bar + self._height/2
+            x_max = x_max - self._width/2
+            y_max = -y_max + self._height/2
+        if out is not None:
+            out[0] = x_bar
+            out[1] = y_bar
+            out[2] = x_max
+            out[3] = y_max
+            return out
+        return ((x_bar, y_bar), (x_max, y_max))
+
+
     def show_hotspot(self, array):
         """!
         @brief   Shows a data array from the IR image as ASCII art, but only includes the hotspot.
         @details Each character is repeated twice so the image isn't squished
-                 laterally. A code of "><" indicates an error, probably caused
-                 by a bad pixel in the camera. 
+                 laterally. The pixels are scaled with integer math, and the
+                 hottest ones are shown with the densest character.
         @param   array The array to be shown, probably @c image.v_ir
         """
-        scale = len(MLX_Cam.asc) / (max(array) - min(array))
-        offset = -min(array)
+        minny = min(array)
+        # A flat image (such as right after startup) is drawn all blank instead of dividing by zero
+        rng = (max(array) - minny) or 1
+        chars = len(MLX_Cam.asc)
+        width = self._width
         for row in range(self._height):
+            # Builds each row (walking its columns mirrored) and prints it at once
+            start = row * width
             line = ""
-            for col in range(self._width):
-                pix = int((array[row * self._width + (self._width - col - 1)]
-                           + offset) * scale)
-                try:
-                    the_char = MLX_Cam.asc[pix]
-                    print(f"{the_char}{the_char}", end='')
-                except IndexError:
-                    print("><", end='')
-            print('')
+            for index in range(start + width - 1, start - 1, -1):
+                pix = int((array[index] - minny) * chars // rng)
+                # Only the hottest pixels scale to one past the last character
+                if pix >= chars:
+                    pix = chars - 1
+                the_char = MLX_Cam.asc[pix]
+                line += the_char + the_char
+            print(line)
         return
 
 
@@ -351,6 +502,9 @@ def test_MLX_cam():
     camera._camera.refresh_rate = 10.0
     print(f"Refresh rate is now:  {camera._camera.refresh_rate}")
 
+    # Preallocated raw image buffer which each finished image is copied into
+    image = np.array('h', bytes(2 * IMAGE_SIZE))
+
     while True:
         try:
             # Get and image and see how long it takes to grab that image
@@ -360,17 +514,14 @@ def test_MLX_cam():
 
             # Keep trying to get an image; this could be done in a task, with
             # the task yielding repeatedly until an image is available
-            image = None
-            while not image:
-                image = camera.get_image_nonblocking()
+            while not camera.get_image_nonblocking_into(image):
                 time.sleep_ms(50)
 
             print(f" {time.ticks_diff(time.ticks_ms(), begintime)} ms")
             
             ignore = [95, 100]
             centered = True
-            x_bar, y_bar = camera.get_centroid(image, ignore, centered)
-            x_max, y_max = camera.get_hotspot(image, centered)
+            (x_bar, y_bar), (x_max, y_max) = camera.get_centroid_and_hotspot_into(image, ignore, centered)
             # Can show image.v_ir, image.alpha, or image.buf; image.v_ir best?
             # Display pixellated grayscale or numbers in CSV format; the CSV
             # could also be written to a file. Spreadsheets, Matlab(tm), or
@@ -1,7 +1,9 @@
 """! @file motor_control.py
 This program creates the class "MotorControl" which initializes the required values for a proportional controller.
 This class also contains the methods to calculate the required effort off of an input position, to set the setpoint, and to set PID controller gains.
+The effort is calculated with integer math only, using Q8 fixed point copies of the gains, in a viper compiled method.
 """
+import micropython
 import utime
 
 class MotorControl:
@@ -12,47 +14,75 @@ class MotorControl:
     def __init__(self, setpoint, Kp, Ki, Kd):
         """! 
         Creates a proportional controller by initializing the desired output
-        and time lists as well as controller properties 
+        and controller properties (no per-run history is kept)
         @param setpoint The desired output  
         @param Kp The proportional controller gain
         @param Ki The integral controller gain
         @param Kd The derivative controller gain
         """
-        self.setpoint = setpoint
-        self.Kp = Kp
-        self.Ki = Ki
-        self.Kd = Kd
+        self.set_setpoint(setpoint)
+        self.set_gain(Kp, Ki, Kd)
         
         self.prev_error = 0
         self.integral_error = 0
-        self.prev_time = 0
         self.first_time = 1
+        # Direction the last effort saturated the motor in (1, -1, or 0 when it didn't)
+        self._sat = 0
     
     
-    def run(self, measured_output, delta_t):
+    @micropython.viper
+    def run(self, measured_output: int, delta_t: int) -> int:
         """! 
         This method takes in the measured output of the plant and returns
-        the effort out of the controller
-        @param measured_output The current measured output of the plant
-        @returns The output effort of the proportional controller
+        the effort out of the controller. All of the math is done with integers
+        (gains in Q8 fixed point) and is compiled with the viper emitter, so it
+        runs as native machine-int code without boxing anything on the heap.
+        @param measured_output The current measured output of the plant as an integer
+        @param delta_t The time since the last run in milliseconds, normally the same every run
+        @returns The integer output effort of the controller
         """
-        curr_time = utime.ticks_ms()
-        error = self.setpoint - measured_output
-        if self.first_time:
+        # Folds the time step into the integral and derivative gains only when it changes, so each run has no divisions by it
+        if delta_t != int(self._dt):
+            self._dt = delta_t
+            Ki_dt = int(self._Ki)*delta_t
+            self._Ki_dt = Ki_dt
+            self._Kd_dt = int(self._Kd)*1000//delta_t
+            # Largest error sum whose integral effort stays within the 100% duty cycle
+            if Ki_dt > 0:
+                self._I_max = 25600000//Ki_dt
+            elif Ki_dt < 0:
+                self._I_max = -25600000//Ki_dt
+            else:
+                self._I_max = 0
+        error = int(self.setpoint) - measured_output
+        if int(self.first_time):
             derror = 0
             self.first_time = 0
         else:
-            derror = (error-self.prev_error)/(delta_t/1000)
-            self.integral_error += error*(delta_t/1000)
-            #derror = (error-self.prev_error)/(curr_time-self.prev_time)
-            #self.integral_error += error*(curr_time-self.prev_time)
-        self.prev_time = curr_time
+            # Change in the error since the last run, and sum of the errors (each one time step long)
+            derror = error-int(self.prev_error)
+            # Only integrates when there is an integral gain, so the unused sum can't overflow, and not while the
+            # last effort saturated in the direction of the error, clamping the sum so it can't wind up
+            if int(self._Ki) and int(self._sat)*error <= 0:
+                integral = int(self.integral_error) + error
+                I_max = int(self._I_max)
+                if integral > I_max:
+                    integral = I_max
+                elif integral < 0-I_max:
+                    integral = 0-I_max
+                self.integral_error = integral
         self.prev_error = error
         
-        prop_output = error*self.Kp
-        int_output = self.integral_error*self.Ki
-        der_output = derror*self.Kd
+        prop_output = (error*int(self._Kp)) >> 8
+        int_output = (int(self.integral_error)*int(self._Ki_dt))//256000
+        der_output = (derror*int(self._Kd_dt)) >> 8
         output = prop_output+int_output+der_output
+        if output > 100:
+            self._sat = 1
+        elif output < -100:
+            self._sat = -1
+        else:
+            self._sat = 0
         return output
     
     
@@ -61,7 +91,8 @@ class MotorControl:
         This method takes in the desired output and sets it
         @param setpoint The desired output of the plant  
         """
-        self.setpoint = setpoint
+        # Kept as an integer for the integer math in run
+        self.setpoint = int(setpoint)
         
         
     def set_gain(self, Kp, Ki, Kd):
@@ -74,18 +105,29 @@ class MotorControl:
         self.Kp = Kp
         self.Ki = Ki
         self.Kd = Kd
+        # Q8 fixed point copies of the gains (resolution of 1/256) used by run
+        self._Kp = int(Kp*256)
+        self._Ki = int(Ki*256)
+        self._Kd = int(Kd*256)
+        # Forces run to refold the time step into the new integral and derivative gains. The folded gains are created
+        # here so run, which is called from a timer interrupt, only rebinds existing attributes and never allocates
+        self._dt = 0
+        self._Ki_dt = 0
+        self._Kd_dt = 0
+        # Anti-windup clamp on the error sum, refolded along with the time step
+        self._I_max = 0
 
 
 if __name__ == "__main__":
     
-    des_pos = 10
+    des_pos = 1000
     curr_pos = 0
     con = MotorControl(0, 0, 0, 0)
     con.set_setpoint(des_pos)
     con.set_gain(0.25,0,0)
     while True:
         try:
-            output = con.run(curr_pos, 10)
+            output = con.run(int(curr_pos), 10)
             curr_pos += output*0.01
             print(curr_pos)
             utime.sleep_ms(10)
@@ -38,6 +38,8 @@ class MotorDriver:
                                           pyb.Timer.PWM,
                                           pin=in2pin,
                                           pulse_width=8000)
+            # The last duty cycle level written, so unchanged levels can skip the timer register writes
+            self._last_level = None
             print ("Created a motor driver")
         except Exception as e:
             print(e)
@@ -52,21 +54,22 @@ class MotorDriver:
         @param level A signed integer holding the duty
                cycle of the voltage sent to the motor 
         """
-        try:
-            # Testing if the level is negative or positive and setting the PWMs of each IN pin correspondingly
-            if level <= 0:
-                if level < -100:
-                    level == -100
-                self.PWM_tim1.pulse_width_percent(0)
-                self.PWM_tim2.pulse_width_percent(-1*level)
-            elif level > 0:
-                if level > 100:
-                    level == 100
-                self.PWM_tim1.pulse_width_percent(level)
-                self.PWM_tim2.pulse_width_percent(0)
-            #print (f"Setting duty cycle to {level}")
-        except Exception as e:
-            print(e)
+        # Saturating the level to the -100 to 100 percent range
+        if level > 100:
+            level = 100
+        elif level < -100:
+            level = -100
+        if level == self._last_level:
+            return
+        self._last_level = level
+        # Testing if the level is negative or positive and setting the PWMs of each IN pin correspondingly
+        if level > 0:
+            self.PWM_tim1.pulse_width_percent(level)
+            self.PWM_tim2.pulse_width_percent(0)
+        else:
+            self.PWM_tim1.pulse_width_percent(0)
+            self.PWM_tim2.pulse_width_percent(-level)
+        #print (f"Setting duty cycle to {level}")
             
            
     def enable(self):
@@ -0,0 +1,117 @@
+"""! @file pid_timer.py
+This program creates the class "PIDTimer" which runs the panning motor's PID loop from a hardware timer interrupt instead of from the Shooting cotask.
+This class reads the encoder, runs the motor controller, and sets the motor driver's duty cycle at a fixed rate, and publishes whether the motor has stayed within range of its setpoint.
+"""
+import pyb
+import utime
+
+
+class PIDTimer:
+    """!
+    This class runs the PID controlled motor from a hardware timer callback so its cadence doesn't depend on the scheduler.
+    """
+    def __init__(self, enc, moe, moe_con, timer, freq=200):
+        """!
+        Creates the PID timer by binding the encoder, motor driver, and motor controller methods used by the callback and setting up the timer
+        @param enc The encoder object of the panning motor
+        @param moe The motor driver object of the panning motor
+        @param moe_con The motor controller object of the panning motor
+        @param timer The hardware timer used to run the PID loop
+        @param freq The frequency of the PID loop in Hz
+        """
+        self._moe_con = moe_con
+        # The last gains given to the controller, so re-targeting with the same gains skips set_gain
+        self._gains = None
+        # Binds the methods once so no allocation happens in the callback
+        self._read = enc.read_position
+        self._run_pid = moe_con.run
+        self._set_duty = moe.set_duty_cycle
+        self._period_ms = 1000//freq
+        self._freq = freq
+        ## Set to 1 once the motor has stayed within range for the stay-within-range time
+        self.settled = 0
+        # Setpoint and stay-within-range in counts, and ticks to stay within range before settling
+        self._setpoint = 0
+        self._range = 0
+        self._hold_ticks = 0
+        self._ticks_left = 0
+
+        self._timer = timer
+        self._timer.init(freq=freq)
+        self._run_cb = self._run
+
+
+    def set_target(self, setpoint, Kp, Ki, Kd, range_interval, time_interval):
+        """!
+        This method sets the setpoint and gains of the controller and the stay-within-range settings, then starts the PID loop if it isn't running
+        @param setpoint The desired position of the motor in counts
+        @param Kp The proportional controller gain
+        @param Ki The integral controller gain
+        @param Kd The derivative controller gain
+        @param range_interval The stay-within-range of the setpoint in counts
+        @param time_interval The stay-within-range time in ms
+        """
+        setpoint = int(setpoint)
+        gains = (Kp, Ki, Kd)
+        # Keeps the callback from running on a half updated controller
+        irq_state = pyb.disable_irq()
+        if gains != self._gains:
+            self._moe_con.set_gain(Kp, Ki, Kd)
+            self._gains = gains
+        self._moe_con.set_setpoint(setpoint)
+        self._setpoint = setpoint
+        self._range = range_interval
+        self._hold_ticks = time_interval*self._freq//1000
+        self._ticks_left = self._hold_ticks
+        self.settled = 0
+        pyb.enable_irq(irq_state)
+        self._timer.callback(self._run_cb)
+
+
+    def stop(self):
+        """!
+        This method stops the PID loop and sets the motor's duty cycle to 0
+        """
+        self._timer.callback(None)
+        self._set_duty(0)
+
+
+    def _run(self, timer):
+        """!
+        This method is the timer callback which runs one step of the PID controlled motor and checks if it has stayed within range. It runs in an interrupt, so it must not allocate memory.
+        @param timer The timer that triggered the callback
+        """
+        pos = self._read()
+        self._set_duty(self._run_pid(pos, self._period_ms))
+        # Counts down the stay-within-range time while within range of the setpoint and restarts it otherwise
+        if abs(pos - self._setpoint) <= self._range:
+            if self._ticks_left > 0:
+                self._ticks_left -= 1
+            else:
+                self.settled = 1
+        else:
+            self._ticks_left = self._hold_ticks
+
+
+# Test Code
+if __name__ == "__main__":
+    import micropython
+    import encoder_reader
+    import motor_control
+    import motor_driver
+
+    micropython.alloc_emergency_exception_buf(100)
+    moe = motor_driver.MotorDriver(pyb.Pin.board.PA10, pyb.Pin.board.PB4, pyb.Pin.board.PB5, pyb.Timer(3, freq=1000))
+    moe.enable()
+    enc = encoder_reader.Encoder(pyb.Pin(pyb.Pin.board.PC6), pyb.Pin(pyb.Pin.board.PC7), pyb.Timer(8, period=65535, prescaler=0))
+    moe_con = motor_control.MotorControl(0, 0, 0, 0)
+    pid = PIDTimer(enc, moe, moe_con, pyb.Timer(6))
+
+    # Step Test
+    pid.set_target(80000, 0.25, 0, 0, 1000, 1000)
+    while not pid.settled:
+        # Reads the position kept up to date by the PID loop, since calling read_position here would race the callback
+        print(enc.tot_count)
+        utime.sleep_ms(100)
+    pid.stop()
+    moe.disable()
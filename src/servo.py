@@ -2,9 +2,26 @@
 This program creates the class "Servo" which initializes the GPIO pins as PWM outputs for a servo motor.
 This class also contains the ability to set the absolute and relative servo position.
 """
+import micropython
 import pyb
+from array import array
+from micropython import const
 import utime
-import math
+
+# Enables the status prints of this driver (set to 1 to compile them in)
+_DEBUG = const(0)
+# Enables the error prints of this driver (set to 0 to compile them out)
+_LOG = const(1)
+
+
+def _log(msg):
+    """!
+    Prints an error message of this driver if error prints are enabled
+    @param msg The message to print
+    """
+    if _LOG:
+        print(msg)
+
 
 class Servo:
     """! 
@@ -17,6 +34,13 @@ class Servo:
         @param timer The corresponding timer for the PWM pin
         @param zero_angle The initial angle in which we want to base our relative positions from
         """
+        # Pulse width per degree as a Q16 fixed-point integer and pulse width at 0 degrees using datasheet specified values
+        # (270*scale stays below the 31-bit small int limit so no long ints are allocated)
+        scale = ((2500-500) << 16)//270 + 1
+        offset = 500 << 16
+        # Pulse width of each whole degree from 0 to 270, built once so setting an angle is a single lookup
+        self._lut = array('H', [(angle*scale + offset) >> 16 for angle in range(271)])
+        self._zero = int(zero_angle)
         try:
             # Initializing pins and timers
             self.pin = pyb.Pin(pin, pyb.Pin.OUT_PP)
@@ -27,46 +51,40 @@ class Servo:
                 raise ValueError("zero_angle larger than 270")
             elif zero_angle < 0:
                 raise ValueError("zero_angle must be positive")
-            # Setting the pulse width of the servo to the desired angle using datasheet specified values
-            self.PWM_tim.pulse_width(int(zero_angle*(2500-500)/(270)+500))
-            print("Servo class created, servo set to zero_angle")
+            # Setting the pulse width of the servo to the desired angle
+            self.SetAngle(int(zero_angle))
+            if _DEBUG:
+                print("Servo class created, servo set to zero_angle")
         except ValueError as e:
-            print('Error, Servo driver failed in initialization')
-            print(e)
+            _log('Error, Servo driver failed in initialization')
+            _log(e)
     
     
-    def SetAngle(self, angle):
+    @micropython.viper
+    def SetAngle(self, angle: int):
         """!
-        This method sets the servo to a given angle in degrees.
+        This method sets the servo to a given angle in degrees. It is compiled with the viper emitter, so the angle must be an integer.
         @param angle An angle ranging from 0 to 270 for absolute position.
         """
-        try:
-            if angle > 270:
-                raise Exception("angle larger than 270")
-            elif angle < 0:
-                raise Exception("angle must be positive")
-            # Setting the pulse width of the servo to the desired angle using datasheet specified values
-            self.PWM_tim.pulse_width(int(angle*(2500-500)/(270)+500))
-        except Exception as e:
-            print("Error executing SetAngle")
-            print(e)
+        if angle < 0 or angle > 270:
+            raise ValueError("angle must be between 0 and 270")
+        # Setting the pulse width of the servo to the desired angle
+        lut = ptr16(self._lut)
+        self.PWM_tim.pulse_width(lut[angle])
 
 
-    def SetDeflection(self, dangle):
+    @micropython.viper
+    def SetDeflection(self, dangle: int):
         """!
-        This method sets the servo to a given angular deflection from zero in degrees.
+        This method sets the servo to a given angular deflection from zero in degrees. It is compiled with the viper emitter, so the angle must be an integer.
         @param dangle An angle ranging from (270-zero_angle) to negative zero_angle
         """
-        try:
-            if dangle + self.zero > 270:
-                raise Exception("deflection exceeds motor limits")
-            elif dangle + self.zero < 0:
-                raise Exception("deflection exceeds motor limits")
-            # Setting the pulse width of the servo to the desired angle using datasheet specified values
-            self.PWM_tim.pulse_width(int((dangle + self.zero)*(2500-500)/(270)+500))
-        except Exception as e:
-            print("Error executing SetDeflection")
-            print(e)
+        angle = dangle + int(self._zero)
+        if angle < 0 or angle > 270:
+            raise ValueError("deflection exceeds motor limits")
+        # Setting the pulse width of the servo to the desired angle
+        lut = ptr16(self._lut)
+        self.PWM_tim.pulse_width(lut[angle])
 
 
 # Test Code
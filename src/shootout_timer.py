@@ -0,0 +1,112 @@
+"""! @file shootout_timer.py
+This program creates the class "ShootoutTimer" which runs the Timing task off of a hardware timer interrupt instead of a polled cotask.
+This class waits on an interrupt from the starting button and then steps through each of the timed sections of the shootout, setting the corresponding flags as each one ends.
+The flags are kept in one array shared with the Shooting task, indexed by START_FLAG, STOP_FLAG, RETURN_FLAG, and BUTTON_FLAG.
+"""
+import pyb
+import utime
+from micropython import const
+
+# Indices of the intertask flags in the shared flag array
+START_FLAG = const(0)
+STOP_FLAG = const(1)
+RETURN_FLAG = const(2)
+BUTTON_FLAG = const(3)
+
+# Lengths of the timed sections of the shootout in ms
+_T_START = const(5000)
+_T_STOP = const(10000)
+_T_STOPPED = const(1000)
+_T_RETURN = const(3000)
+
+
+class ShootoutTimer:
+    """!
+    This class times each section of the shootout from a hardware timer callback.
+    """
+    def __init__(self, flags, button_pin, timer, freq=10):
+        """!
+        Creates the shootout timer by initializing the flags, the timer, and the starting button interrupt
+        @param flags An array('h') of the four flags, indexed by START_FLAG, STOP_FLAG, RETURN_FLAG, and BUTTON_FLAG, set by this timer
+        @param button_pin The CPU pin wired to the starting button
+        @param timer The hardware timer used to tick the shootout timings
+        @param freq The tick frequency of the timer in Hz (the timed sections must be a multiple of its period)
+        """
+        self._flags = flags
+        # Timed states S2-S5 as (state, ticks to wait, flags set once the time elapses)
+        # S2: Wait For Start - Waits 5 seconds for the starting phase, in which the target can move around, to end
+        # S3: Wait For Stop - Waits 10 seconds for the shooting phase, in which the turret is allowed to fire, to end
+        # S4: Stopped - Waits 1 second for the for the turret to stop before returning to its original position
+        # S5: Return - Waits 3 seconds for the for the turret to return to its original position
+        self._timed_states = ((2, _T_START*freq//1000, ((START_FLAG, 1),)),
+                              (3, _T_STOP*freq//1000, ((START_FLAG, 0), (STOP_FLAG, 1))),
+                              (4, _T_STOPPED*freq//1000, ((STOP_FLAG, 0), (RETURN_FLAG, 1))),
+                              (5, _T_RETURN*freq//1000, ((RETURN_FLAG, 0),)))
+        ## The current state of the Timing task
+        self.state = 1
+        # Index into the timed states and ticks left in the current one
+        self._index = 0
+        self._ticks = 0
+        # Initializes intertask flag variables
+        for index in range(len(flags)):
+            flags[index] = 0
+
+        # Sets up the timer, binding its callback once so no allocation happens in the button interrupt that starts it
+        self._timer = timer
+        self._timer.init(freq=freq)
+        self._tick_cb = self._tick
+        # Initializes the starting button pin as a rising edge interrupt with an internal pull-down
+        self._extint = pyb.ExtInt(button_pin, pyb.ExtInt.IRQ_RISING, pyb.Pin.PULL_DOWN, self._press)
+
+
+    def _press(self, line):
+        """!
+        This method is the starting button interrupt callback which begins the timed states. It runs in an interrupt, so it must not allocate memory.
+        @param line The interrupt line that triggered the callback
+        """
+        # S1: Wait For Input
+        # Sets the Button_Flag and starts timing S2, ignoring any further presses (and switch bounce)
+        if self.state == 1:
+            self._extint.disable()
+            self._flags[BUTTON_FLAG] = 1
+            self._index = 0
+            timed_state = self._timed_states[0]
+            self.state = timed_state[0]
+            self._ticks = timed_state[1]
+            self._timer.counter(0)
+            self._timer.callback(self._tick_cb)
+
+
+    def _tick(self, timer):
+        """!
+        This method is the timer callback which advances the timed states by one tick. It runs in an interrupt, so it must not allocate memory.
+        @param timer The timer that triggered the callback
+        """
+        # S2-S5: Timed States
+        self._ticks -= 1
+        if self._ticks <= 0:
+            flags = self._flags
+            for index, value in self._timed_states[self._index][2]:
+                flags[index] = value
+            self._index += 1
+            if self._index < len(self._timed_states):
+                timed_state = self._timed_states[self._index]
+                self.state = timed_state[0]
+                self._ticks = timed_state[1]
+            else:
+                # The shootout has ended, so the timer is no longer needed
+                self.state = 6
+                timer.callback(None)
+
+
+# Test Code
+if __name__ == "__main__":
+    import array
+
+    flags = array.array('h', [0, 0, 0, 0])
+    shootout_timer = ShootoutTimer(flags, pyb.Pin.board.PB0, pyb.Timer(5))
+
+    # Hand Test
+    while shootout_timer.state < 6:
+        print(f"State {shootout_timer.state}: {list(flags)}")
+        utime.sleep_ms(500)
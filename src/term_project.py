@@ -11,57 +11,134 @@ https://matplotlib.org/stable/gallery/user_interfaces/embedding_in_tk_sgskip.htm
 @copyright (c) 2023 by Spluttflob and released under the GNU Public Licenes V3
 """
 
+import atexit
+import queue
 import tkinter
+import threading
 import serial
-import math
-from matplotlib.figure import Figure
-from matplotlib.backends.backend_tkagg import (FigureCanvasTkAgg,
-                                               NavigationToolbar2Tk)
+
+# The serial port, kept open across button presses so each press doesn't have to reopen it
+_serial_port = None
+# Keeps the restart worker and the window closing from using the serial port at the same time
+_serial_lock = threading.RLock()
+# The window, its button, and the queue of button presses, created once and reused by later calls to tk_matplot
+_tk_root = None
+_button_run = None
+_presses = queue.Queue()
+
+def set_low_latency(serial_port):
+    """!
+    This function lowers the latency of the USB serial port so the reset keystrokes aren't held back by the driver
+    @param serial_port The open serial port
+    """
+    # Drops the USB serial latency timer to 1 ms (only supported on Linux)
+    try:
+        serial_port.set_low_latency_mode(True)
+    except (IOError, ValueError, AttributeError, NotImplementedError):
+        pass
+    # Shrinks the transmit buffer so the keystrokes aren't queued behind driver buffering (only supported on Windows)
+    try:
+        serial_port.set_buffer_size(rx_size=4096, tx_size=64)
+    except (IOError, ValueError, AttributeError):
+        pass
+
 
 def restart_device():
     """!
-    This function ensures that there is a COM device connected and writes keystrokes to restart the connected microcontroller 
+    This function ensures that there is a COM device connected and writes keystrokes to restart the connected microcontroller.
+    The serial port is kept open for the rest of the GUI session, so on Windows no other terminal can open the port until the window is closed.
     """
+    global _serial_port
     # States COM device (May vary with different computers)
     com_port = 'COM5'
     
-    # Tries to open the defined serial port and run data, and if it can not, will print error
-    try:
-        serial_port = serial.Serial(com_port, baudrate=115200, timeout=1)
-    except serial.SerialException as error:
-        print(f"could not open serial port '{com_port}': {error}")
-    else:     
-        # Writes (Ctrl-B, Ctrl-C, Ctrl-D) to reset the serial port and rerun main on microcontroller
-        serial_port.write(b'\x02')
-        serial_port.write(b'\x03')
-        serial_port.write(b'\x04')
-        
-        # Closes the serial port
-        serial_port.close()      
+    with _serial_lock:
+        # Writes to the open serial port, and if the write fails (such as on a stale port after the board re-enumerates),
+        # closes it and reopens it to retry once
+        for attempt in range(2):
+            # Tries to open the defined serial port if it isn't already open, and if it can not, will print error
+            if _serial_port is None or not _serial_port.is_open:
+                try:
+                    _serial_port = serial.Serial(com_port, baudrate=115200, timeout=1)
+                except serial.SerialException as error:
+                    print(f"could not open serial port '{com_port}': {error}")
+                    return
+                set_low_latency(_serial_port)
+
+            # Writes (Ctrl-B, Ctrl-C, Ctrl-D) in one buffer to reset the serial port and rerun main on microcontroller
+            try:
+                _serial_port.write(b'\x02\x03\x04')
+                return
+            except serial.SerialException as error:
+                write_error = error
+                close_device()
+        print(f"could not write to serial port '{com_port}': {write_error}")
+
+
+def close_device():
+    """!
+    This function closes the serial port if it is open
+    """
+    global _serial_port
+    with _serial_lock:
+        if _serial_port is not None:
+            try:
+                _serial_port.close()
+            except serial.SerialException:
+                pass
+            _serial_port = None
+
+
+def restart_worker(presses):
+    """!
+    Runs the restart function put in the queue once for each button press, so presses are handled in order on one background thread
+    @param presses The queue that each button press puts its restart function in
+    """
+    while True:
+        restart = presses.get()
+        # Reports any error from the restart, so one failed press doesn't stop the worker from handling the next
+        try:
+            restart()
+        except Exception as error:
+            print(f"could not restart the microcontroller: {error!r}")
 
 
 def tk_matplot(restart_device):
     """!
-    Creates a TK window with a button used to restart the microcontroller
+    Creates a TK window with a button used to restart the microcontroller, or shows the window again if it was already created
     @param restart_device The function which, when run, restarts the microcontroller
     """
-    # Create the main program window and give it a title
-    tk_root = tkinter.Tk()
-    tk_root.wm_title('Run the program!')
-    tk_root.geometry('100x100')
+    global _tk_root, _button_run
+    if _tk_root is None:
+        # Create the main program window and give it a title
+        _tk_root = tkinter.Tk()
+        _tk_root.wm_title('Run the program!')
+        _tk_root.geometry('100x100')
+
+        # Queues each press for one background thread to restart the microcontroller, so the window doesn't freeze
+        # while waiting on the port and repeated presses don't each start a new thread
+        threading.Thread(target=restart_worker, args=(_presses,), daemon=True).start()
+        _button_run = tkinter.Button(master=_tk_root, text="Run Test")
+        _button_run.pack(side='top')
 
-    button_run = tkinter.Button(master=tk_root,
-                                text="Run Test",
-                                command=lambda: restart_device())
-    button_run.pack(side='top')
+        # Closes the serial port and hides the window when it is closed, keeping it to be shown again by the next call
+        def on_close():
+            close_device()
+            _tk_root.withdraw()
+            _tk_root.quit()
+        _tk_root.protocol('WM_DELETE_WINDOW', on_close)
+    else:
+        _tk_root.deiconify()
+    _button_run.configure(command=lambda: _presses.put(restart_device))
 
     # This function runs the program until the user decides to quit
-    tkinter.mainloop()
+    _tk_root.mainloop()
 
 
 # This main code is run if this file is the main program but won't run if this
 # file is imported as a module by some other main program
 if __name__ == "__main__":
+    atexit.register(close_device)
     tk_matplot(restart_device)
 
 